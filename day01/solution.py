@@ -1,3 +1,6 @@
+import re
+from collections import deque
+
 REPLACEMENTS = {
     "one": "1",
     "two": "2",
@@ -10,53 +13,106 @@ REPLACEMENTS = {
     "nine": "9",
 }
 
+DIGITS = {str(d): str(d) for d in range(10)}
+
+
+class Automaton:
+    """Aho-Corasick matcher over a fixed set of patterns.
+
+    Each pattern maps to the digit it stands for. `scan` walks a line once and
+    reports the digits of the first and last matches.
+    """
+
+    def __init__(self, patterns: dict[str, str]):
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail = [0]
+        self.out: list[str | None] = [None]
+        for word, digit in patterns.items():
+            state = 0
+            for ch in word:
+                if ch not in self.goto[state]:
+                    self.goto[state][ch] = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(None)
+                state = self.goto[state][ch]
+            self.out[state] = digit
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, child in self.goto[state].items():
+                queue.append(child)
+                self.fail[child] = self.step(self.fail[state], ch) if state else 0
+                if self.out[child] is None:
+                    self.out[child] = self.out[self.fail[child]]
+
+    def step(self, state: int, ch: str) -> int:
+        while state and ch not in self.goto[state]:
+            state = self.fail[state]
+        return self.goto[state].get(ch, 0)
+
+    def scan(self, line: str) -> tuple[str, str]:
+        first = last = None
+        state = 0
+        for ch in line:
+            state = self.step(state, ch)
+            if (digit := self.out[state]) is not None:
+                if first is None:
+                    first = digit
+                last = digit
+        if first is None or last is None:
+            raise ValueError("No digits in line")
+        return first, last
+
+
+DIGIT_AUTOMATON = Automaton(DIGITS)
+WORD_AUTOMATON = Automaton(DIGITS | REPLACEMENTS)
 
-def has_digit(line: str, allow_words=False):
-    if line == "":
-        return None
-    elif line[0].isdigit():
-        return line[0]
-    elif line[-1].isdigit():
-        return line[-1]
-    elif allow_words:
-        for word, digit in REPLACEMENTS.items():
-            if line.find(word) != -1:
-                return digit
-    return None
 
+def process(line: str, allow_words):
+    automaton = WORD_AUTOMATON if allow_words else DIGIT_AUTOMATON
+    first_digit, last_digit = automaton.scan(line)
+    return int(f"{first_digit}{last_digit}")
 
-def forward_fragments(line):
-    for i in range(len(line)):
-        yield line[: i + 1]
 
+NON_DIGITS = bytes(
+    b for b in range(256) if not (b"0"[0] <= b <= b"9"[0] or b == b"\n"[0])
+)
+FIRST_DIGIT = re.compile(rb"^\d", re.MULTILINE)
+LAST_DIGIT = re.compile(rb"\d$", re.MULTILINE)
 
-def reverse_fragments(line):
-    r = line[::-1]
-    for i in range(len(line)):
-        yield r[: i + 1][::-1]
 
+def digit_sum(digits: bytes) -> int:
+    return sum(d * digits.count(str(d).encode()) for d in range(1, 10))
 
-def search(fragments, allow_words):
-    for fragment in fragments:
-        if d := has_digit(fragment, allow_words):
-            return d
-    raise ValueError("No digits in line")
 
+def solve_buffer(data: bytes) -> int:
+    """Solve part 1 over a whole file without a Python-level loop over lines.
 
-def process(line: str, allow_words):
-    first_digit = search(forward_fragments(line), allow_words)
-    last_digit = search(reverse_fragments(line), allow_words)
-    return int(f"{first_digit}{last_digit}")
+    Everything but digits and newlines is deleted, after which the first and
+    last digit of each line sit at the line boundaries and can be picked out
+    and summed with C-level bytes operations.
+    """
+    num_lines = data.count(b"\n") + (1 if data and not data.endswith(b"\n") else 0)
+    digits = data.translate(None, NON_DIGITS)
+    firsts = b"".join(FIRST_DIGIT.findall(digits))
+    lasts = b"".join(LAST_DIGIT.findall(digits))
+    if len(firsts) != num_lines:
+        raise ValueError("No digits in line")
+    return 10 * digit_sum(firsts) + digit_sum(lasts)
 
 
 def solve(input, allow_words):
-    return sum([process(line, allow_words) for line in input.splitlines()])
+    if not allow_words:
+        return solve_buffer(input.encode())
+    return sum(process(line, allow_words) for line in input.splitlines())
 
 
 def main():
-    with open("input.txt", "r") as f:
-        input = f.read()
-    print(solve(input, allow_words=False))
+    with open("input.txt", "rb") as f:
+        data = f.read()
+    print(solve_buffer(data))
+    input = data.decode()
     print(solve(input, allow_words=True))
 
 
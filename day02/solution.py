@@ -1,5 +1,7 @@
-import re
+from array import array
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Iterator
 
 
 @dataclass
@@ -31,44 +33,171 @@ class Game:
         return required_reds * required_greens * required_blues
 
 
-def parse_color(collection, color):
-    if m := re.search(rf"(\d+) {color}", collection):
-        return int(m.group(1))
-    else:
-        return 0
+class GameTable:
+    """Columnar store of each game's per-color maximum.
+
+    `possible_id_sums` answers a batch of cube budgets in one offline sweep:
+    games and budgets are both taken in order of reds, and each game is added
+    to a 2-D Fenwick tree over its (green, blue) ranks once the budgets reach
+    its reds, so every budget is a dominance prefix query. That is
+    O((games + budgets) log^2 games) per batch.
+    """
+
+    def __init__(self):
+        self.ids = array("q")
+        self.reds = array("q")
+        self.greens = array("q")
+        self.blues = array("q")
+
+    @classmethod
+    def from_games(cls, games: Iterable[Game]):
+        table = cls()
+        for game in games:
+            table.add(
+                game.game_number,
+                max(collection.reds for collection in game.collections),
+                max(collection.greens for collection in game.collections),
+                max(collection.blues for collection in game.collections),
+            )
+        return table
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, game_number, reds, greens, blues):
+        self.ids.append(game_number)
+        self.reds.append(reds)
+        self.greens.append(greens)
+        self.blues.append(blues)
+
+    def power_sum(self):
+        return sum(r * g * b for r, g, b in zip(self.reds, self.greens, self.blues))
+
+    def possible_id_sums(self, budgets: Iterable[tuple[int, int, int]]) -> list[int]:
+        budgets = list(budgets)
+        green_axis = sorted(set(self.greens))
+        blue_axis = sorted(set(self.blues))
+        tree = Fenwick2D(len(green_axis), len(blue_axis))
+        games = sorted(range(len(self)), key=self.reds.__getitem__)
+        added = 0
+        sums = [0] * len(budgets)
+        for q in sorted(range(len(budgets)), key=lambda q: budgets[q][0]):
+            reds, greens, blues = budgets[q]
+            while added < len(games) and self.reds[games[added]] <= reds:
+                game = games[added]
+                tree.add(
+                    bisect_left(green_axis, self.greens[game]),
+                    bisect_left(blue_axis, self.blues[game]),
+                    self.ids[game],
+                )
+                added += 1
+            sums[q] = tree.prefix_sum(
+                bisect_right(green_axis, greens), bisect_right(blue_axis, blues)
+            )
+        return sums
+
+
+class Fenwick2D:
+    """Sparse 2-D Fenwick tree; only touched nodes are stored."""
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.tree = {}
+
+    def add(self, row, col, delta):
+        i = row + 1
+        while i <= self.rows:
+            j = col + 1
+            while j <= self.cols:
+                self.tree[i, j] = self.tree.get((i, j), 0) + delta
+                j += j & -j
+            i += i & -i
+
+    def prefix_sum(self, rows, cols):
+        # sum over [0, rows) x [0, cols)
+        total = 0
+        i = rows
+        while i > 0:
+            j = cols
+            while j > 0:
+                total += self.tree.get((i, j), 0)
+                j -= j & -j
+            i -= i & -i
+        return total
+
+
+COLORS = {ord("r"): 0, ord("g"): 1, ord("b"): 2}
+COLON, SEMICOLON, NEWLINE = b":;\n"
+
+
+class Tokenizer:
+    """Single-pass byte tokenizer for game lines.
+
+    Bytes may be fed in arbitrary chunks; state carries over between calls so a
+    line can be split anywhere. Counts go straight into the current collection
+    as each color's first letter is seen.
+    """
+
+    def __init__(self):
+        self.number = None
+        self.game_number = None
+        self.counts = [0, 0, 0]
+        self.collections = []
+
+    def feed(self, chunk: bytes) -> list[Game]:
+        games = []
+        number, game_number = self.number, self.game_number
+        counts, collections = self.counts, self.collections
+        for byte in chunk:
+            if 48 <= byte <= 57:
+                number = (number or 0) * 10 + byte - 48
+            elif number is not None and byte in COLORS:
+                counts[COLORS[byte]] = number
+                number = None
+            elif byte == COLON:
+                game_number, number = number, None
+            elif byte == SEMICOLON:
+                collections.append(Collection(*counts))
+                counts = [0, 0, 0]
+            elif byte == NEWLINE and game_number is not None:
+                collections.append(Collection(*counts))
+                games.append(Game(game_number, collections))
+                number, game_number = None, None
+                counts, collections = [0, 0, 0], []
+        self.number, self.game_number = number, game_number
+        self.counts, self.collections = counts, collections
+        return games
+
+    def finish(self) -> list[Game]:
+        return self.feed(b"\n")
 
 
-def parse_collection(collection):
-    reds = parse_color(collection, "red")
-    greens = parse_color(collection, "green")
-    blues = parse_color(collection, "blue")
-    return Collection(reds, greens, blues)
+def parse(line):
+    tokenizer = Tokenizer()
+    return (tokenizer.feed(line.encode()) + tokenizer.finish())[0]
 
 
-def parse(line):
-    game_part, collections_part = line.split(": ")
-    game_num = int(game_part.split(" ")[1])
-    collections = [
-        parse_collection(collection) for collection in collections_part.split("; ")
-    ]
-    return Game(game_num, collections)
+def parse_stream(stream: BinaryIO, chunk_size=1 << 16) -> Iterator[Game]:
+    tokenizer = Tokenizer()
+    while chunk := stream.read(chunk_size):
+        yield from tokenizer.feed(chunk)
+    yield from tokenizer.finish()
 
 
-def part1(games):
-    possible_games = (game for game in games if game.is_possible(12, 13, 14))
-    return sum(game.game_number for game in possible_games)
+def part1(table: GameTable):
+    return table.possible_id_sums([(12, 13, 14)])[0]
 
 
-def part2(games):
-    return sum(game.power() for game in games)
+def part2(table: GameTable):
+    return table.power_sum()
 
 
 def main():
-    with open("input") as f:
-        lines = f.readlines()
-    games = [parse(line) for line in lines]
-    print(part1(games))
-    print(part2(games))
+    with open("input", "rb") as f:
+        table = GameTable.from_games(parse_stream(f))
+    print(part1(table))
+    print(part2(table))
 
 
 if __name__ == "__main__":
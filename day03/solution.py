@@ -1,5 +1,7 @@
-from pprint import pprint
+from array import array
+from bisect import bisect_right
 from dataclasses import dataclass
+from typing import Iterable
 import re
 
 TEST_INPUT = """\
@@ -158,6 +160,100 @@ def part2(graph):
     return sum(n.gear_ratio() for n in graph.nodes.values())
 
 
+class Schematic:
+    """Grid-indexed alternative to `Graph`.
+
+    The schematic is kept as one flat string with a newline after each row, and
+    `labels` holds, for every cell, the index into `values` of the number
+    covering it (or -1). Symbol adjacency is then eight index lookups per
+    symbol, and the newline column stops numbers from wrapping across rows.
+    """
+
+    def __init__(self, lines):
+        rows = [line.rstrip("\n") for line in lines]
+        width = max((len(row) for row in rows), default=0)
+        self.stride = width + 1
+        self.text = "".join(row.ljust(width, ".") + "\n" for row in rows)
+        self.labels = array("i", [-1]) * len(self.text)
+        self.values = array("q")
+        for m in re.finditer(r"\d+", self.text):
+            number_id = array("i", [len(self.values)])
+            self.labels[m.start() : m.end()] = number_id * len(m[0])
+            self.values.append(int(m[0]))
+        s = self.stride
+        self.offsets = (-s - 1, -s, -s + 1, -1, 1, s - 1, s, s + 1)
+
+    def adjacent_numbers(self, at):
+        ids = set()
+        for offset in self.offsets:
+            if 0 <= at + offset < len(self.labels) and self.labels[at + offset] >= 0:
+                ids.add(self.labels[at + offset])
+        return ids
+
+    def symbols(self, chars=r"[^\d.\n]"):
+        return (m.start() for m in re.finditer(chars, self.text))
+
+    def part1(self):
+        part_ids = set()
+        for at in self.symbols():
+            part_ids |= self.adjacent_numbers(at)
+        return sum(self.values[i] for i in part_ids)
+
+    def part2(self):
+        total = 0
+        for at in self.symbols(r"\*"):
+            ids = self.adjacent_numbers(at)
+            if len(ids) == 2:
+                total += mult(self.values[i] for i in ids)
+        return total
+
+
+NUMBER = re.compile(r"\d+")
+SYMBOL = re.compile(r"[^\d.\n]")
+
+
+def scan_row(line):
+    row = line.rstrip("\n")
+    numbers = [(m.start(), m.end(), int(m[0])) for m in NUMBER.finditer(row)]
+    return row, numbers, [start for start, _, _ in numbers]
+
+
+def window_totals(above, row, below):
+    text, numbers, _ = row
+    part1 = 0
+    for start, end, value in numbers:
+        lo, hi = max(start - 1, 0), end + 1
+        if any(SYMBOL.search(r[0], lo, hi) for r in (above, row, below)):
+            part1 += value
+    part2 = 0
+    for m in re.finditer(r"\*", text):
+        x = m.start()
+        adjacent = []
+        for _, nums, starts in (above, row, below):
+            i = bisect_right(starts, x + 1)
+            adjacent += [v for _, end, v in nums[max(i - 3, 0) : i] if end >= x]
+        if len(adjacent) == 2:
+            part2 += mult(adjacent)
+    return part1, part2
+
+
+def stream_totals(lines: Iterable[str]):
+    """Compute (part1, part2) holding only three rows of the schematic at once."""
+    empty = scan_row("")
+    part1 = part2 = 0
+    above, row = empty, None
+    for line in lines:
+        below = scan_row(line)
+        if row is not None:
+            p1, p2 = window_totals(above, row, below)
+            part1, part2 = part1 + p1, part2 + p2
+        above, row = row or empty, below
+    if row is not None:
+        p1, p2 = window_totals(above, row, empty)
+        part1, part2 = part1 + p1, part2 + p2
+    return part1, part2
+
+
 def build_graph(numbers, symbols):
     graph = Graph({})
     symbols_by_location = {p: s for s in symbols for p in s.points}
@@ -170,14 +266,9 @@ def build_graph(numbers, symbols):
 
 def main():
     with open("input") as f:
-        lines = f.readlines()
-    # lines = TEST_INPUT.splitlines()
-    symbols = list(parse_symbols(lines))
-    numbers = list(parse_numbers(lines))
-    graph = build_graph(numbers, symbols)
-    pprint(graph)
-    print(part1(graph))
-    print(part2(graph))
+        part_numbers, gear_ratios = stream_totals(f)
+    print(part_numbers)
+    print(gear_ratios)
     # answers: 550934, 81997870
 
 
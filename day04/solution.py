@@ -1,5 +1,7 @@
+from collections import deque
 from dataclasses import dataclass
 from pprint import pprint
+from typing import Iterable, Iterator
 
 TEST_INPUT = """\
 Card 1: 41 48 83 86 17 | 83 86  6 31 17  9 48 53
@@ -14,19 +16,14 @@ Card 6: 31 18 13 56 72 | 74 77 10 23 35 67 36 11
 class Card:
     def __init__(self, card_number, winning_numbers, have_numbers):
         self.card_number = card_number
-        self.winning_numbers = winning_numbers
-        self.have_numbers = have_numbers
-        self._num_winning = None
+        self.winning_mask = Card.to_mask(winning_numbers)
+        self.have_mask = Card.to_mask(have_numbers)
 
     def copies_generated(self):
         return range(self.card_number + 1, self.card_number + 1 + self.num_winning())
 
     def num_winning(self):
-        if self._num_winning == None:
-            self._num_winning = sum(
-                1 for n in self.have_numbers if n in self.winning_numbers
-            )
-        return self._num_winning
+        return (self.winning_mask & self.have_mask).bit_count()
 
     def point_value(self):
         match self.num_winning():
@@ -52,25 +49,56 @@ class Card:
     def parse_numbers(numbers: str):
         return [int(n) for n in numbers.strip().split()]
 
+    def to_mask(numbers: list[int]):
+        mask = 0
+        for n in numbers:
+            mask |= 1 << n
+        return mask
+
 
 def part2(cards: list[Card]):
-    counts = {n: 1 for n in range(1, len(cards) + 1)}
-    for card in cards:
-        num_copies = counts[card.card_number]
-        for n in card.copies_generated():
-            counts[n] += num_copies
-    return sum(counts.values())
+    # difference array: each card adds its copy count to a run of later cards
+    pending = [0] * (len(cards) + 1)
+    total = running = 0
+    for i, card in enumerate(cards):
+        running += pending[i]
+        num_copies = 1 + running
+        total += num_copies
+        if wins := card.num_winning():
+            pending[i + 1] += num_copies
+            pending[min(i + 1 + wins, len(cards))] -= num_copies
+    return total
+
+
+def stream_totals(lines: Iterable[str]) -> Iterator[tuple[int, int]]:
+    """Yield running (points, cards) totals after each card line.
+
+    Pending copies are kept as a difference window over the next few cards,
+    never longer than the largest win count seen, so memory does not grow with
+    the number of cards.
+    """
+    pending = deque()
+    points = cards = running = 0
+    for line in lines:
+        card = Card.from_line(line)
+        running += pending.popleft() if pending else 0
+        num_copies = 1 + running
+        points += card.point_value()
+        cards += num_copies
+        if wins := card.num_winning():
+            pending.extend([0] * (wins + 1 - len(pending)))
+            pending[0] += num_copies
+            pending[wins] -= num_copies
+        yield points, cards
 
 
 def main():
+    points = cards = 0
     with open("input") as f:
-        lines = f.readlines()
-    # lines = TEST_INPUT.splitlines()
-    cards = [Card.from_line(line) for line in lines]
-    # pprint(cards)
-    ans1 = sum(card.point_value() for card in cards)
-    print(ans1)
-    print(part2(cards))
+        for points, cards in stream_totals(f):
+            pass
+    print(points)
+    print(cards)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,13 @@
 from __future__ import annotations
+from array import array
+from bisect import bisect_right
 from dataclasses import dataclass
+from functools import cached_property
+import hashlib
 import itertools
 import math
+import mmap
+import os
 from pprint import pprint
 import re
 
@@ -42,6 +48,10 @@ humidity-to-location map:
 """
 
 
+CACHE_MAGIC = int.from_bytes(b"almanac3", "little")
+CACHE_HEADER_WORDS = 4
+
+
 def flatten(iterable):
     return list(itertools.chain.from_iterable(iterable))
 
@@ -101,6 +111,82 @@ class Map:
                 return dest_range[key - source_range.start]
         return key
 
+    def compile(self) -> Piecewise:
+        starts, offsets = [0], [0]
+        for dest_range, source_range in sorted(self.mappings, key=lambda m: m[1].start):
+            if source_range.start != starts[-1]:
+                starts.append(source_range.start)
+                offsets.append(0)
+            offsets[-1] = dest_range.start - source_range.start
+            starts.append(source_range.stop)
+            offsets.append(0)
+        return Piecewise.merged(starts, offsets)
+
+    def from_piecewise(name, piecewise: Piecewise) -> Map:
+        mappings = tuple(
+            (range(start + offset, stop + offset), range(start, stop))
+            for start, stop, offset in piecewise.segments(0)
+            if offset != 0
+        )
+        return Map(name, mappings)
+
+
+@dataclass(frozen=True)
+class Piecewise:
+    """A map over the non-negative integers as sorted breakpoints and offsets.
+
+    Values in [starts[i], starts[i + 1]) map to value + offsets[i]; the last
+    piece extends to infinity. starts[0] is always 0.
+    """
+
+    starts: tuple(int)
+    offsets: tuple(int)
+
+    def merged(starts, offsets) -> Piecewise:
+        merged_starts, merged_offsets = [], []
+        for start, offset in zip(starts, offsets):
+            if merged_starts and merged_starts[-1] == start:
+                merged_offsets[-1] = offset
+            elif not merged_offsets or merged_offsets[-1] != offset:
+                merged_starts.append(start)
+                merged_offsets.append(offset)
+        return Piecewise(tuple(merged_starts), tuple(merged_offsets))
+
+    def checked(starts, offsets) -> Piecewise:
+        if not starts or starts[0] != 0 or offsets[-1] != 0:
+            raise ValueError("Piecewise map must start at 0 and end with offset 0")
+        if any(a >= b for a, b in zip(starts, starts[1:])):
+            raise ValueError("Piecewise map starts must strictly increase")
+        return Piecewise(tuple(starts), tuple(offsets))
+
+    def segments(self, start: int, stop: int | None = None):
+        # yields (start, stop, offset) covering [start, stop); None is unbounded
+        i = bisect_right(self.starts, start) - 1
+        while i < len(self.starts) and (stop is None or self.starts[i] < stop):
+            end = self.starts[i + 1] if i + 1 < len(self.starts) else None
+            if stop is not None and (end is None or end > stop):
+                end = stop
+            yield max(self.starts[i], start), end, self.offsets[i]
+            i += 1
+
+    def then(self, other: Piecewise) -> Piecewise:
+        starts, offsets = [], []
+        for start, stop, offset in self.segments(0):
+            image_stop = None if stop is None else stop + offset
+            for image_start, _, other_offset in other.segments(
+                start + offset, image_stop
+            ):
+                starts.append(image_start - offset)
+                offsets.append(offset + other_offset)
+        return Piecewise.merged(starts, offsets)
+
+    def __getitem__(self, key: int):
+        return key + self.offsets[bisect_right(self.starts, key) - 1]
+
+    def map_range(self, source_range: range) -> list(range):
+        for start, stop, offset in self.segments(source_range.start, source_range.stop):
+            yield range(start + offset, stop + offset)
+
 
 @dataclass(frozen=True)
 class Data:
@@ -114,17 +200,97 @@ class Data:
         maps = tuple(Map.parse(name, lines.splitlines()) for name, lines in map_blocks)
         return Data(seeds, maps)
 
-    def seed_location(self, seed: int) -> int:
-        location = seed
+    def to_bytes(self) -> bytes:
+        # int64 words: magic, #seeds, #maps, #name bytes, pieces per map and in
+        # the composed map, seeds, then the starts and offsets of each map and
+        # of the composed map; map names follow as newline-joined utf-8
+        pieces = [map.compile() for map in self.maps] + [self.compiled]
+        names = "\n".join(map.name for map in self.maps).encode()
+        words = array("q", [CACHE_MAGIC, len(self.seeds), len(self.maps), len(names)])
+        words.extend(len(p.starts) for p in pieces)
+        words.extend(self.seeds)
+        for p in pieces:
+            words.extend(p.starts)
+            words.extend(p.offsets)
+        return words.tobytes() + names
+
+    def from_buffer(buffer) -> Data:
+        # the header and lengths are checked through a view of the buffer; the
+        # pieces are then copied out, since the buffer may not outlive the call
+        with memoryview(buffer) as view:
+            if len(view) < 8 * CACHE_HEADER_WORDS:
+                raise ValueError("Truncated almanac cache")
+            with view[: len(view) // 8 * 8] as aligned, aligned.cast("q") as words:
+                magic, num_seeds, num_maps, names_size = words[:CACHE_HEADER_WORDS]
+                if magic != CACHE_MAGIC:
+                    raise ValueError("Not an almanac cache")
+                at = CACHE_HEADER_WORDS + num_maps + 1
+                if min(num_seeds, num_maps, names_size) < 0 or at > len(words):
+                    raise ValueError("Corrupt almanac cache")
+                sizes = tuple(words[CACHE_HEADER_WORDS:at])
+                num_words = at + num_seeds + 2 * sum(sizes)
+                if min(sizes) < 1 or len(view) != 8 * num_words + names_size:
+                    raise ValueError("Truncated or corrupt almanac cache")
+                seeds = tuple(words[at : at + num_seeds])
+                at += num_seeds
+                names = bytes(view[8 * num_words :]).decode()
+                names = names.split("\n") if num_maps else []
+                if len(names) != num_maps:
+                    raise ValueError("Corrupt almanac cache")
+                pieces = []
+                for size in sizes:
+                    starts = tuple(words[at : at + size])
+                    offsets = tuple(words[at + size : at + 2 * size])
+                    pieces.append(Piecewise.checked(starts, offsets))
+                    at += 2 * size
+        maps = tuple(map(Map.from_piecewise, names, pieces))
+        data = Data(seeds, maps)
+        # cached_property storage, so loading doesn't compose the chain again
+        data.__dict__["compiled"] = pieces[-1]
+        return data
+
+    def load(path, cache_dir=None) -> Data:
+        """Parse the almanac at `path`, reusing a binary cache keyed by its hash.
+
+        The cache lives in an .almanac-cache directory next to the input unless
+        `cache_dir` is given. A cache that can't be read is rebuilt.
+        """
+        if cache_dir is None:
+            cache_dir = os.path.join(os.path.dirname(path), ".almanac-cache")
+        with open(path, "rb") as f:
+            raw = f.read()
+        cache_path = os.path.join(
+            cache_dir, f"almanac-{hashlib.sha256(raw).hexdigest()}.bin"
+        )
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "rb") as f, mmap.mmap(
+                    f.fileno(), 0, access=mmap.ACCESS_READ
+                ) as buffer:
+                    return Data.from_buffer(buffer)
+            except ValueError:
+                pass
+        data = Data.parse(raw.decode())
+        os.makedirs(cache_dir, exist_ok=True)
+        # write then rename so an interrupted run never leaves a partial cache
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data.to_bytes())
+        os.replace(temp_path, cache_path)
+        return data
+
+    @cached_property
+    def compiled(self) -> Piecewise:
+        compiled = Piecewise((0,), (0,))
         for map in self.maps:
-            location = map[location]
-        return location
+            compiled = compiled.then(map.compile())
+        return compiled
+
+    def seed_location(self, seed: int) -> int:
+        return self.compiled[seed]
 
     def range_locations(self, seed_range: range) -> list(range):
-        ranges = [seed_range]
-        for map in self.maps:
-            ranges = flatten(map.map_range(r) for r in ranges)
-        return ranges
+        return list(self.compiled.map_range(seed_range))
 
     def nearest_seed_location(self) -> int:
         return min(self.seed_location(seed) for seed in self.seeds)
@@ -140,10 +306,7 @@ class Data:
 
 
 def main():
-    # input = TEST_INPUT
-    with open("input") as f:
-        input = f.read()
-    data = Data.parse(input)
+    data = Data.load("input")
     print("part 1:", data.nearest_seed_location())
     print("part 2:", data.nearest_seed_location_range_version())
 
@@ -1,10 +1,9 @@
 from pprint import pprint
 from functools import reduce
-
-INPUT = """\
-Time:        41     96     88     94
-Distance:   214   1789   1127   1055
-"""
+from typing import Iterable, Iterator
+import math
+import sys
+import time
 
 TEST_INPUT = """\
 Time:      7  15   30
@@ -19,6 +18,13 @@ def parse_input(input) -> list[(int, int)]:
     return list(zip(time, distance))
 
 
+def parse_input_kerned(input) -> (int, int):
+    lines = input.splitlines()
+    time = int("".join(lines[0].split()[1:]))
+    distance = int("".join(lines[1].split()[1:]))
+    return time, distance
+
+
 def get_distance(race_time, button_time):
     return button_time * (race_time - button_time)
 
@@ -29,8 +35,29 @@ def num_ways_to_win(race_time, record):
     return sum(1 for d in winning_distances)
 
 
+def num_ways_to_win_exact(race_time, record):
+    # winning button times b solve b^2 - race_time*b + record < 0; isqrt gives
+    # the lower root to within one, and the range is symmetric about race_time/2
+    disc = race_time * race_time - 4 * record
+    if disc <= 0:
+        return 0
+    low = max((race_time - math.isqrt(disc)) // 2, 0)
+    while low > 0 and get_distance(race_time, low - 1) > record:
+        low -= 1
+    while 2 * low <= race_time and get_distance(race_time, low) <= record:
+        low += 1
+    return max(race_time - 2 * low + 1, 0)
+
+
+def num_ways_to_win_batch(race_times: Iterable[int], records: Iterable[int]):
+    return [
+        num_ways_to_win_exact(race_time, record)
+        for race_time, record in zip(race_times, records, strict=True)
+    ]
+
+
 def part1(race_infos):
-    num_ways = [num_ways_to_win(race_time, record) for race_time, record in race_infos]
+    num_ways = num_ways_to_win_batch(*zip(*race_infos))
     return reduce(lambda x, y: x * y, num_ways)
 
 
@@ -59,10 +86,56 @@ def binary_search_max(time, min_dist):
 
 
 def part2(time, min_dist):
-    min_button_time = binary_search_min(time, min_dist)
-    max_button_time = binary_search_max(time, min_dist)
+    return num_ways_to_win_exact(time, min_dist)
+
+
+def race_results(race_infos) -> Iterator[tuple[int, int, int]]:
+    for race_time, record in race_infos:
+        yield race_time, record, num_ways_to_win_exact(race_time, record)
+
+
+def binary_search_ways(race_time, record):
+    min_button_time = binary_search_min(race_time, record)
+    max_button_time = binary_search_max(race_time, record)
+    if get_distance(race_time, min_button_time) <= record:
+        return 0
     return max_button_time - min_button_time + 1
 
 
-print(part1(parse_input(INPUT)))
-print(part2(41968894, 214178911271055))
+def benchmark(max_linear_time=10**7):
+    """Time each solver on races of 10^3 to 10^18 ms.
+
+    The linear scan is skipped once the race is longer than max_linear_time.
+    """
+    solvers = [
+        ("linear", num_ways_to_win),
+        ("binary search", binary_search_ways),
+        ("closed form", num_ways_to_win_exact),
+    ]
+    for exponent in range(3, 19, 3):
+        race_time = 10**exponent
+        record = race_time * race_time // 5
+        for name, solver in solvers:
+            if solver is num_ways_to_win and race_time > max_linear_time:
+                print(f"10^{exponent:<2} {name:>13}: skipped")
+                continue
+            start = time.perf_counter()
+            ways = solver(race_time, record)
+            elapsed = time.perf_counter() - start
+            print(f"10^{exponent:<2} {name:>13}: {elapsed * 1e6:12.1f} us ({ways})")
+
+
+def main():
+    if sys.argv[1:] == ["--benchmark"]:
+        benchmark()
+        return
+    with open(sys.argv[1] if len(sys.argv) > 1 else "input") as f:
+        input = f.read()
+    for race_time, record, ways in race_results(parse_input(input)):
+        print(f"time {race_time}, record {record}: {ways} ways")
+    print(part1(parse_input(input)))
+    print(part2(*parse_input_kerned(input)))
+
+
+if __name__ == "__main__":
+    main()
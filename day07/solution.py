@@ -1,5 +1,7 @@
+from collections import defaultdict
 from dataclasses import dataclass
 from enum import Enum
+from operator import attrgetter
 from pprint import pprint
 
 TEST_INPUT = """\
@@ -24,6 +26,42 @@ class HandType(Enum):
     FIVE_OF_A_KIND = 7
 
 
+# indexed by number of jokers, then by the sorted counts of the other cards
+HAND_TYPES = [
+    {
+        (5,): HandType.FIVE_OF_A_KIND,
+        (1, 4): HandType.FOUR_OF_A_KIND,
+        (2, 3): HandType.FULL_HOUSE,
+        (1, 1, 3): HandType.THREE_OF_A_KIND,
+        (1, 2, 2): HandType.TWO_PAIR,
+        (1, 1, 1, 2): HandType.ONE_PAIR,
+        (1, 1, 1, 1, 1): HandType.HIGH_CARD,
+    },
+    {
+        (4,): HandType.FIVE_OF_A_KIND,
+        (1, 3): HandType.FOUR_OF_A_KIND,
+        (2, 2): HandType.FULL_HOUSE,
+        (1, 1, 2): HandType.THREE_OF_A_KIND,
+        (1, 1, 1, 1): HandType.ONE_PAIR,
+    },
+    {
+        (3,): HandType.FIVE_OF_A_KIND,
+        (1, 2): HandType.FOUR_OF_A_KIND,
+        (1, 1, 1): HandType.THREE_OF_A_KIND,
+    },
+    {
+        (2,): HandType.FIVE_OF_A_KIND,
+        (1, 1): HandType.FOUR_OF_A_KIND,
+    },
+    {
+        (1,): HandType.FIVE_OF_A_KIND,
+    },
+    {
+        (): HandType.FIVE_OF_A_KIND,
+    },
+]
+
+
 class Hand:
     def __init__(self, cards_str, bid, joker_rule=False):
         self.joker_rule = joker_rule
@@ -39,6 +77,7 @@ class Hand:
             self.num_jokers = self.cards.count(0)
         self.card_counts = tuple(sorted(self.cards.count(c) for c in self.card_set))
         self.bid = bid
+        self.key = self.sort_key()
 
     def parse(line, joker_rule=False):
         cards_str, bid = line.split()
@@ -48,56 +87,111 @@ class Hand:
         return f"<{self.cards_str}>({self.bid})"
 
     def type_rank(self):
-        if not self.joker_rule or self.num_jokers == 0:
-            return {
-                (5,): HandType.FIVE_OF_A_KIND,
-                (1, 4): HandType.FOUR_OF_A_KIND,
-                (2, 3): HandType.FULL_HOUSE,
-                (1, 1, 3): HandType.THREE_OF_A_KIND,
-                (1, 2, 2): HandType.TWO_PAIR,
-                (1, 1, 1, 2): HandType.ONE_PAIR,
-                (1, 1, 1, 1, 1): HandType.HIGH_CARD,
-            }[self.card_counts]
-        elif self.num_jokers == 1:
-            return {
-                (4,): HandType.FIVE_OF_A_KIND,
-                (1, 3): HandType.FOUR_OF_A_KIND,
-                (2, 2): HandType.FULL_HOUSE,
-                (1, 1, 2): HandType.THREE_OF_A_KIND,
-                (1, 1, 1, 1): HandType.ONE_PAIR,
-            }[self.card_counts]
-        elif self.num_jokers == 2:
-            return {
-                (3,): HandType.FIVE_OF_A_KIND,
-                (1, 2): HandType.FOUR_OF_A_KIND,
-                (1, 1, 1): HandType.THREE_OF_A_KIND,
-            }[self.card_counts]
-        elif self.num_jokers == 3:
-            return {
-                (2,): HandType.FIVE_OF_A_KIND,
-                (1, 1): HandType.FOUR_OF_A_KIND,
-            }[self.card_counts]
-        elif self.num_jokers == 4:
-            return {
-                (1,): HandType.FIVE_OF_A_KIND,
-            }[self.card_counts]
-        elif self.num_jokers == 5:
-            return HandType.FIVE_OF_A_KIND
-        else:
-            raise ValueError(f"Invalid number of jokers: {self.num_jokers}")
+        num_jokers = self.num_jokers if self.joker_rule else 0
+        try:
+            return HAND_TYPES[num_jokers][self.card_counts]
+        except IndexError:
+            raise ValueError(f"Invalid number of jokers: {num_jokers}")
+
+    def sort_key(self):
+        key = self.type_rank().value
+        for card in self.cards:
+            key = key * len(CARD_VALS) + card
+        return key
 
     def __lt__(self, other):
-        if self.type_rank().value == other.type_rank().value:
-            return self.cards < other.cards
-        else:
-            return self.type_rank().value < other.type_rank().value
+        return self.key < other.key
 
 
 def total_winnings(hands):
-    hands.sort()
+    hands.sort(key=attrgetter("key"))
     return sum(h.bid * rank for rank, h in enumerate(hands, 1))
 
 
+class Fenwick:
+    """Sparse Fenwick tree over [0, size); only touched nodes are stored."""
+
+    def __init__(self, size):
+        self.size = size
+        self.tree = {}
+
+    def add(self, i, delta):
+        i += 1
+        while i <= self.size:
+            self.tree[i] = self.tree.get(i, 0) + delta
+            i += i & -i
+
+    def prefix_sum(self, stop):
+        total = 0
+        while stop > 0:
+            total += self.tree.get(stop, 0)
+            stop -= stop & -stop
+        return total
+
+
+KEY_BASE = HandType.HIGH_CARD.value * len(CARD_VALS) ** 5
+KEY_SPACE = len(HandType) * len(CARD_VALS) ** 5
+
+
+class HandIndex:
+    """Running `total_winnings` for hands inserted and removed one at a time.
+
+    Hands are counted and their bids summed in Fenwick trees over the packed
+    key space, so each update adjusts `total` in O(log KEY_SPACE). Hands with
+    the same cards rank in insertion order, as a stable sort would leave them;
+    removing one also scans the hands tied with it. All hands must share the
+    index's joker rule.
+    """
+
+    def __init__(self, joker_rule=False):
+        self.joker_rule = joker_rule
+        self.counts = Fenwick(KEY_SPACE)
+        self.bids = Fenwick(KEY_SPACE)
+        self.ties = defaultdict(list)
+        self.num_hands = 0
+        self.bid_sum = 0
+        self.total = 0
+
+    def __len__(self):
+        return self.num_hands
+
+    def _slot(self, hand: Hand):
+        if hand.joker_rule != self.joker_rule:
+            raise ValueError(f"Hand {hand} does not use joker_rule={self.joker_rule}")
+        return hand.key - KEY_BASE
+
+    def insert(self, hand: Hand):
+        # the new hand ranks above everything with an equal or lower key, and
+        # every hand above it gains one more bid
+        slot = self._slot(hand)
+        rank = self.counts.prefix_sum(slot + 1) + 1
+        above = self.bid_sum - self.bids.prefix_sum(slot + 1)
+        self.total += hand.bid * rank + above
+        self.counts.add(slot, 1)
+        self.bids.add(slot, hand.bid)
+        self.ties[slot].append(hand)
+        self.num_hands += 1
+        self.bid_sum += hand.bid
+
+    def remove(self, hand: Hand):
+        slot = self._slot(hand)
+        tied = self.ties.get(slot, [])
+        position = next((i for i, h in enumerate(tied) if h is hand), None)
+        if position is None:
+            raise ValueError(f"Hand {hand} is not in the index")
+        rank = self.counts.prefix_sum(slot) + position + 1
+        above = self.bid_sum - self.bids.prefix_sum(slot + 1)
+        above += sum(h.bid for h in tied[position + 1 :])
+        self.total -= hand.bid * rank + above
+        del tied[position]
+        if not tied:
+            del self.ties[slot]
+        self.counts.add(slot, -1)
+        self.bids.add(slot, -hand.bid)
+        self.num_hands -= 1
+        self.bid_sum -= hand.bid
+
+
 def main():
     with open("input") as f:
         lines = f.readlines()
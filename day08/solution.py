@@ -1,9 +1,13 @@
+from array import array
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pprint import pprint
 from itertools import *
 from dataclasses import dataclass
 import re
 import math
+from typing import Iterable
 
 TEST_INPUT1 = """\
 RL
@@ -51,11 +55,137 @@ class Node:
         return type(self) == type(other) and self.name == other.name
 
 
+@dataclass(frozen=True)
+class GhostCycle:
+    """Where one ghost stands on a Z, as a prefix followed by a repeating cycle.
+
+    A ghost's state is (node, direction index), so it must repeat within
+    nodes * len(directions) steps. prefix_hits are the Z steps before the cycle
+    starts at step `start`; from then on it is on a Z exactly at the steps
+    congruent to one of `residues` modulo `length`.
+    """
+
+    start: int
+    length: int
+    prefix_hits: tuple[int]
+    residues: tuple[int]
+
+    def is_hit(self, step):
+        if step < self.start:
+            return step in self.prefix_hits
+        return step % self.length in self.residues
+
+
+def analyze_ghost(start, children, moves, is_z) -> GhostCycle:
+    period = len(moves)
+    seen = array("q", [-1]) * (len(is_z) * period)
+    loc, step, hits = start, 0, []
+    while seen[state := loc * period + step % period] < 0:
+        seen[state] = step
+        if is_z[loc]:
+            hits.append(step)
+        loc = children[moves[step % period]][loc]
+        step += 1
+    cycle_start = seen[state]
+    length = step - cycle_start
+    return GhostCycle(
+        cycle_start,
+        length,
+        tuple(h for h in hits if h < cycle_start),
+        tuple(sorted({h % length for h in hits if h >= cycle_start})),
+    )
+
+
+def crt(a1, m1, a2, m2):
+    # solve x = a1 (mod m1), x = a2 (mod m2) for any moduli; None if no solution
+    g = math.gcd(m1, m2)
+    if (a2 - a1) % g:
+        return None
+    m = m2 // g
+    k = (a2 - a1) // g * pow(m1 // g, -1, m) % m if m > 1 else 0
+    lcm = m1 // g * m2
+    return (a1 + m1 * k) % lcm, lcm
+
+
+def first_common_hit(ghosts: list[GhostCycle]) -> int:
+    # before every ghost is in its cycle, only the latest starter's prefix can match
+    latest = max(ghosts, key=lambda g: g.start)
+    for step in latest.prefix_hits:
+        if all(ghost.is_hit(step) for ghost in ghosts):
+            return step
+    solutions = {(0, 1)}
+    for ghost in ghosts:
+        solutions = {
+            solution
+            for r, m in solutions
+            for residue in ghost.residues
+            if (solution := crt(r, m, residue, ghost.length)) is not None
+        }
+    if not solutions:
+        raise ValueError("Ghosts never stand on Z nodes together")
+    return min(r + (latest.start - r + m - 1) // m * m for r, m in solutions)
+
+
 class Puzzle:
     def __init__(self, lines) -> None:
         self.directions = lines[0].strip()
         nodes = (Node(line) for line in lines[2:])
         self.nodes = {node.name: node for node in nodes}
+        self.compile()
+
+    def compile(self):
+        self.names = list(self.nodes)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.children = (
+            array("i", (self.index[node.left] for node in self.nodes.values())),
+            array("i", (self.index[node.right] for node in self.nodes.values())),
+        )
+        try:
+            self.moves = ["LR".index(d) for d in self.directions]
+        except ValueError:
+            raise ValueError(f"Unknown direction in: {self.directions}")
+        self._jump_tables = {}
+
+    def jump_tables(self, targets: frozenset[str]):
+        """Binary-lifting tables over whole passes of `directions`.
+
+        jumps[k][i] is the node reached from node i after 2**k passes, and
+        hits[k][i] says whether a target is reached along the way. first_hit[i]
+        is the step within one pass from i at which a target is first reached,
+        or 0 if none is.
+        """
+        if targets in self._jump_tables:
+            return self._jump_tables[targets]
+        is_target = [name in targets for name in self.names]
+        steps = [self.children[move] for move in self.moves]
+        ends, first_hit = array("i"), array("i")
+        for start in range(len(self.names)):
+            loc, hit = start, 0
+            for step, child in enumerate(steps, 1):
+                loc = child[loc]
+                if not hit and is_target[loc]:
+                    hit = step
+            ends.append(loc)
+            first_hit.append(hit)
+        jumps, hits = [ends], [[h > 0 for h in first_hit]]
+        # a target reachable at all is reached within len(names) passes
+        for _ in range(len(self.names).bit_length()):
+            jump, hit = jumps[-1], hits[-1]
+            jumps.append(array("i", (jump[j] for j in jump)))
+            hits.append([hit[i] or hit[j] for i, j in enumerate(jump)])
+        self._jump_tables[targets] = first_hit, jumps, hits
+        return self._jump_tables[targets]
+
+    def steps_to(self, start: str, targets: Iterable[str]) -> int:
+        first_hit, jumps, hits = self.jump_tables(frozenset(targets))
+        loc, passes = self.index[start], 0
+        for k in reversed(range(len(jumps))):
+            if not hits[k][loc]:
+                loc = jumps[k][loc]
+                passes += 1 << k
+        if not first_hit[loc]:
+            raise ValueError(f"No target reachable from {start}")
+        return passes * len(self.moves) + first_hit[loc]
 
     def go(self, node, direction):
         if direction == "L":
@@ -66,14 +196,7 @@ class Puzzle:
             raise ValueError(f"Unknown direction: {direction}")
 
     def traverse(self):
-        loc = self.nodes["AAA"]
-        directions = cycle(self.directions)
-        path = []
-        while loc.name != "ZZZ":
-            direction = next(directions)
-            loc = self.go(loc, direction)
-            path.append(loc)
-        return path
+        return self.steps_to("AAA", ["ZZZ"])
 
     def multitraverse_naive(self):
         locs = [node for name, node in self.nodes.items() if name.endswith("A")]
@@ -86,16 +209,13 @@ class Puzzle:
         return steps
 
     def steps_to_first_z(self, starting_loc):
-        loc = starting_loc
-        directions = cycle(self.directions)
-        steps = 0
-        while not loc.name.endswith("Z"):
-            direction = next(directions)
-            loc = self.go(loc, direction)
-            steps += 1
-        return steps
+        if starting_loc.name.endswith("Z"):
+            return 0
+        z_names = [name for name in self.names if name.endswith("Z")]
+        return self.steps_to(starting_loc.name, z_names)
 
-    def multitraverse(self):
+    def multitraverse_lcm(self):
+        # only valid when each ghost's first Z is also its cycle length
         steps = [
             self.steps_to_first_z(node)
             for name, node in self.nodes.items()
@@ -103,6 +223,16 @@ class Puzzle:
         ]
         return math.lcm(*steps)
 
+    def multitraverse(self, max_workers=None):
+        starts = [i for i, name in enumerate(self.names) if name.endswith("A")]
+        is_z = [name.endswith("Z") for name in self.names]
+        analyze = partial(
+            analyze_ghost, children=self.children, moves=self.moves, is_z=is_z
+        )
+        with ProcessPoolExecutor(max_workers) as executor:
+            ghosts = list(executor.map(analyze, starts))
+        return first_common_hit(ghosts)
+
 
 def main():
     # lines = TEST_INPUT1.splitlines()
@@ -111,8 +241,7 @@ def main():
     with open("input") as f:
         lines = f.readlines()
     puzzle = Puzzle(lines)
-    path = puzzle.traverse()
-    print("part 1:", len(path))
+    print("part 1:", puzzle.traverse())
     print(puzzle.multitraverse())
 
 
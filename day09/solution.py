@@ -1,6 +1,8 @@
 from pprint import pprint
 from itertools import *
 from functools import *
+from math import comb
+from operator import mul
 
 TEST_INPUT = """\
 0 3 6 9 12 15
@@ -27,15 +29,76 @@ def get_prev_val(seq: [int]):
     return seq[0] - lower_prev_val
 
 
+@cache
+def extrapolation_coefficients(n):
+    # unrolling the difference pyramid of n values gives binomial weights
+    next_coeffs = tuple((-1) ** (n - 1 - i) * comb(n, i) for i in range(n))
+    prev_coeffs = tuple((-1) ** i * comb(n, i + 1) for i in range(n))
+    return next_coeffs, prev_coeffs
+
+
+def extrapolate_all(seqs: list[list[int]]):
+    """Return (next_vals, prev_vals) for every sequence, one dot product each."""
+    next_vals, prev_vals = [], []
+    for seq in seqs:
+        next_coeffs, prev_coeffs = extrapolation_coefficients(len(seq))
+        next_vals.append(sum(map(mul, next_coeffs, seq)))
+        prev_vals.append(sum(map(mul, prev_coeffs, seq)))
+    return next_vals, prev_vals
+
+
+class SequencePredictor:
+    """Predicts the next and previous values of a growing sequence.
+
+    Only the first and last element of each difference level are kept, and a
+    level is only stored once it holds a nonzero difference; the levels above
+    the stored ones are all zero. Predictions match `get_next_val` and
+    `get_prev_val` exactly, while a sequence of degree d keeps d + 1 levels and
+    costs O(d) per appended reading however long the history. With max_degree
+    set, differences above that order are taken to be zero.
+    """
+
+    def __init__(self, max_degree=None):
+        self.max_degree = max_degree
+        self.num_readings = 0
+        self.firsts = []
+        self.lasts = []
+
+    def append(self, value):
+        for level, last in enumerate(self.lasts):
+            self.lasts[level], value = value, value - last
+        # value is the new element of the first unstored level, whose earlier
+        # elements were all zero; a nonzero one forces that level, and each
+        # level above it down to a single element, to be stored
+        level = len(self.lasts)
+        while value != 0 and level <= self.num_readings:
+            if self.max_degree is not None and level > self.max_degree:
+                break
+            self.firsts.append(0 if level < self.num_readings else value)
+            self.lasts.append(value)
+            level += 1
+        self.num_readings += 1
+
+    @property
+    def next_val(self):
+        return sum(self.lasts)
+
+    @property
+    def prev_val(self):
+        return sum(
+            first if level % 2 == 0 else -first
+            for level, first in enumerate(self.firsts)
+        )
+
+
 def main():
     # lines = TEST_INPUT.splitlines()
     with open("input") as f:
         lines = f.readlines()
     seqs = [parse_line(line) for line in lines]
-    next_vals = [get_next_val(seq) for seq in seqs]
+    next_vals, prev_vals = extrapolate_all(seqs)
     ans1 = sum(next_vals)
     print(ans1)
-    prev_vals = [get_prev_val(seq) for seq in seqs]
     ans2 = sum(prev_vals)
     print(ans2)
 
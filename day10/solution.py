@@ -1,3 +1,5 @@
+from array import array
+from functools import cached_property
 import math
 from pprint import pprint
 
@@ -26,54 +28,99 @@ def is_outside_test(row, col, quadrant):
     return False
 
 
+DIRECTIONS = "NESW"
+
+# TURNS[tile * 4 + incoming direction] is the outgoing direction, or -1 if the
+# tile can't be entered that way
+TURNS = [-1] * 256 * 4
+for tile, turns in {
+    "|": ("NN", "SS"),
+    "-": ("EE", "WW"),
+    "L": ("SE", "WN"),
+    "J": ("SW", "EN"),
+    "7": ("NW", "ES"),
+    "F": ("NE", "WS"),
+}.items():
+    for incoming, outgoing in turns:
+        TURNS[ord(tile) * 4 + DIRECTIONS.index(incoming)] = DIRECTIONS.index(outgoing)
+
+
 class Maze:
     def __init__(self, lines):
-        self.maze = lines
-        self.height = len(lines)
-        self.width = len(lines[0])
+        rows = [line.rstrip("\n") for line in lines]
+        self.height = len(rows)
+        self.width = len(rows[0])
+        # a "." column after each row and a "." row above and below, so a pipe
+        # leading off any edge runs into a tile that can't be entered
+        self.stride = self.width + 1
+        padding = "." * self.stride
+        padded = [padding, *(row + "." for row in rows), padding]
+        self.grid = bytearray("".join(padded), "ascii")
+        self.offsets = (-self.stride, 1, self.stride, -1)
         self.start_loc = self.find_start()
-        self.path = list(self.traverse())
-        self.path_set = set(self.path)
+        self.loop = array("q", self.traverse_indices())
 
-    def __getitem__(self, loc):
+    @cached_property
+    def path(self):
+        return [self.loc(at) for at in self.loop]
+
+    @cached_property
+    def path_set(self):
+        return set(self.path)
+
+    def index(self, loc):
         row, col = loc
-        return self.maze[row][col]
+        return (row + 1) * self.stride + col
+
+    def loc(self, index):
+        row, col = divmod(index, self.stride)
+        return row - 1, col
+
+    def __getitem__(self, loc):
+        return chr(self.grid[self.index(loc)])
 
     def __setitem__(self, loc, val):
-        row, col = loc
-        s = self.maze[row]
-        self.maze[row] = s[:col] + val + s[col + 1 :]
+        self.grid[self.index(loc)] = ord(val)
 
     def __str__(self):
-        return "\n".join("".join(row) for row in self.maze)
+        return "\n".join(
+            self.grid[self.index((row, 0)) : self.index((row, self.width))].decode()
+            for row in range(self.height)
+        )
 
     def in_bounds(self, row, col):
         return 0 <= row < self.height and 0 <= col < self.width
 
     def find_start(self):
-        for row in range(self.height):
-            for col in range(self.width):
-                if self[row, col] == "S":
-                    return row, col
+        return self.loc(self.grid.index(b"S"))
 
-    def traverse(self):
-        loc = self.start_loc
-        [d1, d2] = list(self.find_start_connections())
+    def traverse_indices(self):
+        grid, offsets = self.grid, self.offsets
+        at = self.index(self.start_loc)
+        d1, d2 = (DIRECTIONS.index(d) for d in self.find_start_connections())
         dir = d1
-        end = Maze.move(loc, d2)
-        while loc != end:
-            loc, dir = self.follow(loc, dir)
-            yield loc
+        end = at + offsets[d2]
+        while at != end:
+            at += offsets[dir]
+            dir = TURNS[grid[at] * 4 + dir]
+            if dir < 0:
+                raise ValueError("Invalid follow at {}".format(self.loc(at)))
+            yield at
+
+    def traverse(self):
+        for at in self.traverse_indices():
+            yield self.loc(at)
 
     def find_start_connections(self):
-        if self[Maze.move(self.start_loc, "N")] in ("|", "F", "7"):
-            yield "N"
-        if self[Maze.move(self.start_loc, "S")] in ("|", "J", "L"):
-            yield "S"
-        if self[Maze.move(self.start_loc, "E")] in ("-", "7", "J"):
-            yield "E"
-        if self[Maze.move(self.start_loc, "W")] in ("-", "F", "L"):
-            yield "W"
+        for dir in "NSEW":
+            row, col = Maze.move(self.start_loc, dir)
+            if not self.in_bounds(row, col) or self[row, col] == "S":
+                continue
+            if (
+                TURNS[self.grid[self.index((row, col))] * 4 + DIRECTIONS.index(dir)]
+                >= 0
+            ):
+                yield dir
 
     def replace_start(self):
         row, col = self.start_loc
@@ -94,38 +141,6 @@ class Maze:
             case _:
                 raise ValueError("Invalid start: {} {}".format(d1, d2))
 
-    def follow(self, loc, dir):
-        match dir, self[loc]:
-            case "N", "|":
-                new_dir = "N"
-            case "N", "F":
-                new_dir = "E"
-            case "N", "7":
-                new_dir = "W"
-            case "S", "|":
-                new_dir = "S"
-            case "S", "J":
-                new_dir = "W"
-            case "S", "L":
-                new_dir = "E"
-            case "E", "-":
-                new_dir = "E"
-            case "E", "7":
-                new_dir = "S"
-            case "E", "J":
-                new_dir = "N"
-            case "W", "-":
-                new_dir = "W"
-            case "W", "F":
-                new_dir = "S"
-            case "W", "L":
-                new_dir = "N"
-            case d, "S":
-                new_dir = d
-            case d, l:
-                raise ValueError("Invalid follow: {} {}".format(d, l))
-        return Maze.move(loc, new_dir), new_dir
-
     def move(loc, direction):
         row, col = loc
         match direction:
@@ -236,6 +251,19 @@ class Maze:
         )
         return (q for q in reachable_quadrants if self.in_bounds(q[0], q[1]))
 
+    def enclosed_tiles(self) -> int:
+        # shoelace gives the area of the loop (closed back through the start),
+        # then Pick's theorem removes the boundary: interior = area - boundary / 2 + 1
+        twice_area = 0
+        r1, c1 = self.start_loc
+        for at in self.loop:
+            r2, c2 = self.loc(at)
+            twice_area += r1 * c2 - r2 * c1
+            r1, c1 = r2, c2
+        r2, c2 = self.start_loc
+        twice_area += r1 * c2 - r2 * c1
+        return (abs(twice_area) - len(self.loop) - 1) // 2 + 1
+
     def reachable_cells(
         self, from_quadrant: tuple[int, int, str]
     ) -> list[tuple[int, int]]:
@@ -255,13 +283,9 @@ def main():
     # lines = TEST_INPUT1.splitlines()
     lines = open("input").readlines()
     maze = Maze(lines)
-    ans1 = math.ceil(len(maze.path) / 2)
+    ans1 = math.ceil(len(maze.loop) / 2)
     print(ans1)
-    outside_cells = maze.reachable_cells((0, 0, "NW"))
-    num_outside_cells = len(outside_cells)
-    total_cells = maze.height * maze.width
-    num_inside_cells = total_cells - num_outside_cells
-    print(num_inside_cells)
+    print(maze.enclosed_tiles())
 
 
 if __name__ == "__main__":
@@ -16,15 +16,22 @@ TEST_INPUT = """\
 """
 
 
+def empty_before(coords):
+    # empty_before[i] is the number of unoccupied indices less than i
+    occupied = [False] * (max(coords, default=-1) + 1)
+    for x in coords:
+        occupied[x] = True
+    counts = list(itertools.accumulate((not o for o in occupied), initial=0))
+    return counts[:-1]
+
+
 def expand(locs, expansion_factor):
-    present_rows = set(r for r, _ in locs)
-    present_cols = set(c for _, c in locs)
+    empty_rows_before = empty_before([r for r, _ in locs])
+    empty_cols_before = empty_before([c for _, c in locs])
     for r, c in locs:
-        num_empty_rows_before = r - sum(1 for pr in present_rows if pr < r)
-        num_empty_cols_before = c - sum(1 for pc in present_cols if pc < c)
         yield (
-            r + (num_empty_rows_before * (expansion_factor - 1)),
-            c + (num_empty_cols_before * (expansion_factor - 1)),
+            r + (empty_rows_before[r] * (expansion_factor - 1)),
+            c + (empty_cols_before[c] * (expansion_factor - 1)),
         )
 
 
@@ -32,8 +39,37 @@ def dist(loc1, loc2):
     return abs(loc1[0] - loc2[0]) + abs(loc1[1] - loc2[1])
 
 
+def axis_sumdist(coords):
+    # after sorting, the i-th coordinate is the larger one in i of the pairs
+    total = prefix = 0
+    for i, x in enumerate(sorted(coords)):
+        total += x * i - prefix
+        prefix += x
+    return total
+
+
 def sumdist(locs):
-    return sum(dist(loc1, loc2) for loc1, loc2 in itertools.combinations(locs, 2))
+    return axis_sumdist(r for r, _ in locs) + axis_sumdist(c for _, c in locs)
+
+
+def distance_coefficients(locs):
+    """Return (base, per_unit) such that for any expansion factor f,
+    sumdist(expand(locs, f)) == base + per_unit * (f - 1).
+
+    Expansion keeps galaxies in the same order along each axis, so every
+    pairwise gap is the original gap plus (f - 1) times the empty lines between.
+    """
+    empty_rows_before = empty_before([r for r, _ in locs])
+    empty_cols_before = empty_before([c for _, c in locs])
+    row_units = axis_sumdist(empty_rows_before[r] for r, _ in locs)
+    col_units = axis_sumdist(empty_cols_before[c] for _, c in locs)
+    return sumdist(locs), row_units + col_units
+
+
+def total_distance(coefficients, expansion_factor):
+    # works elementwise when expansion_factor is an array of factors
+    base, per_unit = coefficients
+    return base + per_unit * (expansion_factor - 1)
 
 
 def main():
@@ -45,10 +81,9 @@ def main():
         for c, cell in enumerate(row)
         if cell == "#"
     ]
-    expanded_part1 = list(expand(locs, expansion_factor=2))
-    print(sumdist(expanded_part1))
-    expanded_part2 = list(expand(locs, expansion_factor=1_000_000))
-    print(sumdist(expanded_part2))
+    coefficients = distance_coefficients(locs)
+    print(total_distance(coefficients, expansion_factor=2))
+    print(total_distance(coefficients, expansion_factor=1_000_000))
 
 
 if __name__ == "__main__":
@@ -1,7 +1,10 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from enum import Enum
-import functools
 import itertools
+import os
 from pprint import pprint
+import time
 from typing import Iterable
 
 
@@ -78,8 +81,7 @@ class Record:
         return checksum == checksum(states)
 
     def num_solutions(self) -> int:
-        solve.cache_clear()
-        return solve(tuple(self.states), tuple(self.checksum))
+        return count_arrangements(self.states, self.checksum)
 
 
 def checksum(states: list[State]) -> list[int]:
@@ -89,61 +91,87 @@ def checksum(states: list[State]) -> list[int]:
     return [len(g) for g in damaged_groups]
 
 
-def counts(states: list[State]) -> (int, int, int):
-    working = 0
-    damaged = 0
-    unknown = 0
-    for s in states:
-        if s == State.WORKING:
-            working += 1
-        elif s == State.DAMAGED:
-            damaged += 1
-        else:
-            unknown += 1
-    return (working, damaged, unknown)
-
-
-@functools.cache
-def solve(states: tuple[State], checksum: tuple[int]) -> int:
-    _num_working, num_damaged, num_unknown = counts(states)
-    if num_damaged == 0 and len(checksum) == 0:
-        return 1
-    elif len(states) == 0 or len(checksum) == 0:
-        return 0
-    elif num_damaged + num_unknown < sum(checksum):
-        return 0
-    else:
-        head, *rest = states
-        if head == State.WORKING:
-            return solve(tuple(rest), checksum)
-        elif head == State.UNKNOWN:
-            return solve((State.DAMAGED, *rest), checksum) + solve(
-                (State.WORKING, *rest), checksum
-            )
-        else:  # state == State.DAMAGED
-            c = checksum[0]
-            if len(states) < c:
-                return 0
-            elif any(s == State.WORKING for s in states[:c]):
-                return 0
-            elif c == len(states) or states[c] != State.DAMAGED:
-                return solve(states[c + 1 :], checksum[1:])
-            else:
-                return 0
+def prefix_counts(states: list[State], state: State) -> list[int]:
+    return list(itertools.accumulate((s == state for s in states), initial=0))
+
+
+def count_arrangements(states: list[State], checksum: Checksum) -> int:
+    """Count arrangements by DP over (position, group index).
+
+    Row j of the DP holds, for every position p, the number of arrangements of
+    states[p:] matching checksum[j:]; only the row for j + 1 is kept while
+    filling row j, so a record costs O(len(states) * len(checksum)) time.
+    Whether a run of length c fits at p is answered in O(1) from prefix counts
+    of working and damaged cells.
+    """
+    n = len(states)
+    working = prefix_counts(states, State.WORKING)
+    damaged = prefix_counts(states, State.DAMAGED)
+    # a run placed at p consumes p + c and the separator after it, so rows
+    # extend to n + 1
+    ways = [int(damaged[n] == damaged[p]) for p in range(n + 1)] + [1]
+    for c in reversed(checksum):
+        next_ways, ways = ways, [0] * (n + 2)
+        for p in reversed(range(n)):
+            if states[p] != State.DAMAGED:
+                ways[p] += ways[p + 1]
+            if (
+                p + c <= n
+                and working[p + c] == working[p]
+                and (p + c == n or states[p + c] != State.DAMAGED)
+            ):
+                ways[p] += next_ways[p + c + 1]
+    return ways[0]
+
+
+@dataclass
+class SolveStats:
+    index: int
+    num_solutions: int
+    seconds: float
+    dp_cells: int
+
+
+def solve_chunk(chunk: list[tuple[int, Record]]) -> list[SolveStats]:
+    # each record gets a fresh DP table, so nothing carries over between rows
+    stats = []
+    for index, record in chunk:
+        start = time.perf_counter()
+        num_solutions = count_arrangements(record.states, record.checksum)
+        elapsed = time.perf_counter() - start
+        n = len(record.states)
+        dp_cells = n + 2 + n * len(record.checksum)
+        stats.append(SolveStats(index, num_solutions, elapsed, dp_cells))
+    return stats
+
+
+def solve_batch(records: list[Record], max_workers=None, chunk_size=None):
+    """Solve records across a process pool, returning SolveStats in input order.
+
+    Records are handed out in chunks (by default about four per worker) so
+    that uneven record costs balance out without per-record dispatch overhead.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    chunk_size = chunk_size or max(1, len(records) // (4 * max_workers))
+    indexed = list(enumerate(records))
+    chunks = [indexed[i : i + chunk_size] for i in range(0, len(indexed), chunk_size)]
+    with ProcessPoolExecutor(max_workers) as executor:
+        results = executor.map(solve_chunk, chunks)
+        return [stats for chunk_stats in results for stats in chunk_stats]
 
 
 def main():
     # lines = TEST_INPUT.splitlines()
     lines = open("input").readlines()
     records1 = [Record(line) for line in lines]
-    num_solutions = [r.num_solutions() for r in records1]
-    # pprint(num_solutions)
-    ans1 = sum(num_solutions)
+    stats1 = solve_batch(records1)
+    # pprint(stats1)
+    ans1 = sum(s.num_solutions for s in stats1)
     print(ans1)
     records2 = [Record(line, unfold=True) for line in lines]
-    num_solutions2 = [r.num_solutions() for r in records2]
-    # pprint(num_solutions2)
-    ans2 = sum(num_solutions2)
+    stats2 = solve_batch(records2)
+    # pprint(max(stats2, key=lambda s: s.seconds))
+    ans2 = sum(s.num_solutions for s in stats2)
     print(ans2)
     # 690697471078056 -- too high
 